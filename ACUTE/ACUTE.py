@@ -13,20 +13,77 @@ Author: acuteteam
 """
 
 from ctypes import *
-from typing import Union, Any, Callable
+from typing import Union, Any, Callable, List, Optional, Tuple
 import pickle
+import struct
 import os
+import socket
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor
 import time
+from collections import deque
 from datetime import datetime
 import io
+import copy
+import json
+import re
+import mmap
 import sys
-import torch
-from torch.distributed import init_process_group, destroy_process_group
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import safetensors
+except ImportError:
+    safetensors = None
 
 __version__ = '0.1.4'
 
+# torch is imported on first use, so importing ACUTE and running the remote node, which only handles bytes, stay cheap
+torch = None
+
+def _import_torch():
+    """
+    Import torch and torch.distributed into the module namespace if they have not been imported yet.
+    """
+    global torch
+    if torch is None:
+        import torch
+        import torch.distributed
+
+# Arguments that may be missing from the user's argument namespace, with their default values
+__optional_arguments = {
+    'max_batch_bytes': 0,
+    'max_batch_delay': 0.0,
+    'async_copy': False,
+    'checkpoint_format': 'torch',
+    'checkpoint_dtype': None,
+    'shard_compression': False,
+    'file_name_include_epoch': False,
+    'training_master_addr': None,
+    'training_master_port': None,
+}
+
+# Layout of the 'raw' checkpoint format: magic, header size, pickled header, then the tensor data aligned to the alignment
+_RAW_CHECKPOINT_MAGIC = b'ACUTERAW'
+_RAW_CHECKPOINT_ALIGNMENT = 64
+
+# The metadata file written next to each checkpoint file, so the epoch can be read without loading the checkpoint
+_SNAPSHOT_METADATA_SUFFIX = '.meta.json'
+
+# Checkpoint files named with file_name_include_epoch, '<model name>_ep<epoch>[_<datetime>].pt.tar'
+_EPOCH_FILE_NAME_PATTERN = re.compile(r'_ep(\d{8})(?:_\d{4}-\d{2}-\d{2}-\d{6})?\.pt\.tar$')
+
+# The starting epoch broadcast by rank 0 when the snapshot could not be read
+_SNAPSHOT_READ_FAILED = -1
+
+# The number of shards that may wait in the sender thread's queue before the Copier blocks
+_SEND_QUEUE_CAPACITY = 16
+
 class MPI:
     """
     MPI class provides initialization and functions for MPI communication.
@@ -40,74 +97,150 @@ class MPI:
 
     Functions:
     - send: Sends data via MPI communication.
+    - send_bytes / send_obj: Sends a bytes-like buffer as is, or a serialized Python object.
+    - start_sender_thread / enqueue_send / enqueue_send_parts / wait_send / stop_sender_thread: Sends data in order from a thread in the MPI module.
     - recv: Receives data via MPI communication.
+    - recv_all: Receives data from several sources at once via MPI communication.
+    - irecv_all / wait_all: Posts receives from several sources and waits for them later.
+    - broadcast_int / broadcast_bytes: Broadcasts an integer or bytes from the root rank to all ranks.
+    - finalize: Finalizes the MPI communication.
     - make_sharding_rank: Collects and organizes rank numbers for sharding.
     - set_environ: Sets environment variables for distributed training and multilevel checkpointing.
 
     Variables:
     - rank: The rank number of the processor.
     - size: The total number of processors.
+    - remote_rank: The rank number of the remote node.
+    - is_remote: Whether this processor is the remote node.
     - Get_processor_name: The name of the processor.
     """
 
     # Importing and Initializing the MPI module
+    # The function prototypes are declared once here, so each call only marshals plain Python ints and buffers.
     __mpi_module = CDLL('./mpi_module.so')
     __create_mpi_communication = __mpi_module.create_mpi_communication
     __create_mpi_communication.restype = c_void_p
     __delete_mpi_communication = __mpi_module.delete_mpi_communication
     __delete_mpi_communication.argtypes = [c_void_p]
 
+    __get_rank = __mpi_module.getRank
+    __get_rank.argtypes = [c_void_p]
+    __get_rank.restype = c_int
+
+    __get_size = __mpi_module.getSize
+    __get_size.argtypes = [c_void_p]
+    __get_size.restype = c_int
+
+    __get_processor_name = __mpi_module.getProcessorName
+    __get_processor_name.argtypes = [c_void_p, POINTER(c_char_p), POINTER(c_int)]
+    __get_processor_name.restype = None
+
+    __send = __mpi_module.send
+    __send.argtypes = [c_void_p, c_int, c_int, c_void_p, c_int]
+    __send.restype = None
+
+    __start_sender_thread = __mpi_module.startSenderThread
+    __start_sender_thread.argtypes = [c_void_p, c_int, c_int, c_int]
+    __start_sender_thread.restype = c_void_p
+
+    __enqueue_send = __mpi_module.enqueueSend
+    __enqueue_send.argtypes = [c_void_p, c_void_p, c_int]
+    __enqueue_send.restype = None
+
+    __enqueue_send_parts = __mpi_module.enqueueSendParts
+    __enqueue_send_parts.argtypes = [c_void_p, POINTER(c_void_p), POINTER(c_int), c_int]
+    __enqueue_send_parts.restype = None
+
+    __wait_send = __mpi_module.waitSend
+    __wait_send.argtypes = [c_void_p, c_long]
+    __wait_send.restype = None
+
+    __stop_sender_thread = __mpi_module.stopSenderThread
+    __stop_sender_thread.argtypes = [c_void_p]
+    __stop_sender_thread.restype = None
+
+    __probe = __mpi_module.probe
+    __probe.argtypes = [c_void_p, c_int, c_int]
+    __probe.restype = c_int
+
+    __recv_into = __mpi_module.recvInto
+    __recv_into.argtypes = [c_void_p, c_int, c_int, c_void_p, c_int]
+    __recv_into.restype = None
+
+    __probe_all = __mpi_module.probeAll
+    __probe_all.argtypes = [c_void_p, POINTER(c_int), c_int, c_int, POINTER(c_int)]
+    __probe_all.restype = None
+
+    __recv_all_into = __mpi_module.recvAllInto
+    __recv_all_into.argtypes = [c_void_p, POINTER(c_int), c_int, c_int, POINTER(c_void_p), POINTER(c_int)]
+    __recv_all_into.restype = None
+
+    __create_requests = __mpi_module.createRequests
+    __create_requests.argtypes = [c_int]
+    __create_requests.restype = c_void_p
+
+    __irecv_into = __mpi_module.irecvInto
+    __irecv_into.argtypes = [c_void_p, c_int, c_int, c_void_p, c_int, c_void_p, c_int]
+    __irecv_into.restype = None
+
+    __wait_all = __mpi_module.waitAll
+    __wait_all.argtypes = [c_void_p, c_void_p, c_int]
+    __wait_all.restype = None
+
+    __all_gather_int = __mpi_module.allGatherInt
+    __all_gather_int.argtypes = [c_void_p, c_void_p, c_int, c_void_p, c_int]
+    __all_gather_int.restype = None
+
+    __broadcast_int = __mpi_module.broadcastInt
+    __broadcast_int.argtypes = [c_void_p, POINTER(c_int), c_int]
+    __broadcast_int.restype = None
+
+    __broadcast_bytes = __mpi_module.broadcastBytes
+    __broadcast_bytes.argtypes = [c_void_p, c_void_p, c_int, c_int]
+    __broadcast_bytes.restype = None
+
     def __init__(self):
         """
         Initializes the MPI class.
 
         Purpose:
-        - Loads the shared object (.so) file containing the MPI module.
-        - Defines the necessary functions and variables for MPI communication.
+        - Creates the MPI communication from the shared object (.so) file containing the MPI module.
+        - Retrieves the rank, size and other necessary variables for MPI communication.
         """
 
         # Creating MPI communication
         self.__mpi_communication = self.__create_mpi_communication()
 
         # Retrieving rank and size
-        self.__get_rank = self.__mpi_module.getRank
-        self.__get_rank.argtypes = [c_void_p]
-        self.__get_rank.restype = c_int
-        self.rank = self.__get_rank (self.__mpi_communication)
+        self.rank = self.__get_rank(self.__mpi_communication)
+        self.size = self.__get_size(self.__mpi_communication)
 
-        self.__get_size = self.__mpi_module.getSize
-        self.__get_size.argtypes = [c_void_p]
-        self.__get_size.restype = c_int
-        self.size = self.__get_size (self.__mpi_communication)
+        # The last rank is the remote node; the training ranks 0 to size-2 form the torch.distributed world
+        self.remote_rank = self.size-1
+        self.is_remote = self.rank == self.remote_rank
 
         # Retrieving processor name
-        self.__get_processor_name = self.__mpi_module.getProcessorName
-        self.__get_processor_name.argtypes = [c_void_p, POINTER(c_char_p), POINTER(c_int)]
-        self.__get_processor_name.restype = None
-        self.__processor_name = None
-
-        # Initializing send and receive functions
-        self.__send = self.__mpi_module.send
-        self.__send.argtypes = [c_void_p, c_int, c_int, c_void_p, c_int]
-        self.__send.restype = None
-
-        self.__recv = self.__mpi_module.recv
-        self.__recv.argtypes = [c_void_p, c_int, c_int, POINTER(c_void_p), POINTER(c_int)]
-        self.__recv.restype = None
-
-        # Initializing other necessary functions and variables
-        self.__all_gather_int = self.__mpi_module.allGatherInt
-        self.__all_gather_int.argtypes = [c_void_p, c_void_p, c_int, c_void_p, c_int]
-        self.__all_gather_int.restype = None
-
-        self.__free_buffer = self.__mpi_module.free_buffer
-        self.__free_buffer.argtypes = [c_void_p]
-        self.__free_buffer.restype = None
+        # MPI_Get_processor_name is already called when the communication is created, so this only copies the cached name
+        data_buffer = c_char_p()
+        data_buffer_size = c_int()
+        self.__get_processor_name(self.__mpi_communication, byref(data_buffer), byref(data_buffer_size))
+        self.__processor_name = data_buffer.value.decode()
 
         self.sharding_rank_list = None
 
     def __del__(self):
-        self.__delete_mpi_communication(self.__mpi_communication)
+        self.finalize()
+
+    def finalize(self) -> None:
+        """
+        Finalizes the MPI communication. The MPI object cannot be used afterwards.
+
+        Returns:
+            None
+        """
+        if self.__mpi_communication is not None:
+            self.__delete_mpi_communication(self.__mpi_communication)
+            self.__mpi_communication = None
 
     def Get_processor_name(self):
         """
@@ -117,25 +250,58 @@ class MPI:
             The name of the processor.
 
         """
-        if self.__processor_name is None:
-            data_buffer = c_char_p()
-            data_buffer_size = c_int()
-            self.__get_processor_name(self.__mpi_communication, byref(data_buffer), byref(data_buffer_size))
-            self.__processor_name = data_buffer.value.decode() 
         return self.__processor_name
 
-    def _send(self, data:Any, dest:int, tag:int) -> None:
-        serialized_data = pickle.dumps(data)
-        data_length = len(serialized_data)
-        self.__send(self.__mpi_communication, c_int(int(dest)), c_int(int(tag)), serialized_data, data_length)
+    def send_obj(self, data:Any, dest:int, tag:int) -> None:
+        """
+        Serializes a Python object and sends it via MPI communication. Use recv() to receive it.
+
+        Args:
+            data: The object to be sent.
+            dest: The destination rank number.
+            tag: The tag for message identification.
+
+        Returns:
+            None
+        """
+        # Objects that support out-of-band pickling (pickle.PickleBuffer, numpy arrays, ...) are kept out of the
+        # pickle stream by protocol 5 and sent as separate messages right after the header. Plain bytes and bytearray
+        # are still pickled in-band.
+        out_of_band_buffers = []
+        serialized_data = pickle.dumps(data, protocol=5, buffer_callback=out_of_band_buffers.append)
+        self.send_bytes(struct.pack('<I', len(out_of_band_buffers)) + serialized_data, dest, tag)
+        for buffer in out_of_band_buffers:
+            self.send_bytes(buffer.raw(), dest, tag)
+
+    @staticmethod
+    def _byte_pointer(data:Union[bytes, bytearray, memoryview]) -> Tuple[Any, int]:
+        # Writable buffers are passed to C without copying; the returned pointer keeps the buffer alive.
+        if isinstance(data, bytes):
+            return data, len(data)
+        view = memoryview(data).cast('B')
+        data_length = view.nbytes
+        return (view.tobytes() if view.readonly else (c_char * data_length).from_buffer(view)), data_length
+
+    def send_bytes(self, data:Union[bytes, bytearray, memoryview], dest:int, tag:int) -> None:
+        """
+        Sends a bytes-like buffer via MPI communication as is, without serializing it.
+        This is the fast path; use recv(deserialize=False) to receive it.
 
-    def _byte_send(self, data:bytes, dest:int, tag:int) -> None:
-        data_length = len(data)
-        self.__send(self.__mpi_communication, c_int(int(dest)), c_int(int(tag)), data, data_length)
+        Args:
+            data: The buffer to be sent.
+            dest: The destination rank number.
+            tag: The tag for message identification.
+
+        Returns:
+            None
+        """
+        data_pointer, data_length = self._byte_pointer(data)
+        self.__send(self.__mpi_communication, dest, tag, data_pointer, data_length)
 
     def send(self, data:Any, dest:int, tag:int) -> None:
         """
         Sends data via MPI communication.
+        Bytes-like data is sent as is with send_bytes(), anything else is serialized with send_obj().
 
         Args:
             data: The data to be sent.
@@ -145,20 +311,99 @@ class MPI:
         Returns:
             None
         """
-        if isinstance(data, bytes):
-            self._byte_send(data, dest, tag)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self.send_bytes(data, dest, tag)
         else:
-            self._send(data, dest, tag)
+            self.send_obj(data, dest, tag)
 
-    def _recv(self, source:int, tag:int) -> bytes:
-        data_buffer = c_void_p()
-        data_buffer_size = c_int()
-        self.__recv(self.__mpi_communication, c_int(int(source)), c_int(int(tag)), byref(data_buffer), byref(data_buffer_size))
-        recvdata = string_at(data_buffer, data_buffer_size.value)
-        self.__free_buffer(data_buffer)
+    def start_sender_thread(self, dest:int, tag:int, capacity:int) -> int:
+        """
+        Starts a thread in the MPI module that sends the enqueued data in order.
+        The thread runs entirely in C, so sending does not hold the GIL between messages.
+
+        Args:
+            dest: The destination rank number.
+            tag: The tag for message identification.
+            capacity: The number of messages that may wait to be sent at once.
+
+        Returns:
+            The handle of the sender thread.
+        """
+        return self.__start_sender_thread(self.__mpi_communication, dest, tag, capacity)
+
+    def enqueue_send(self, sender:int, data:Union[bytes, bytearray, memoryview]) -> Any:
+        """
+        Enqueues data to be sent by a sender thread without waiting for it to be sent.
+        If capacity messages are already waiting to be sent, this blocks until the oldest of them has been sent.
+
+        Args:
+            sender: The handle of the sender thread.
+            data: The data to be sent.
+
+        Returns:
+            The pointer to the data, which must be kept alive until wait_send() reports that the data has been sent.
+        """
+        data_pointer, data_length = self._byte_pointer(data)
+        self.__enqueue_send(sender, data_pointer, data_length)
+        return data_pointer
+
+    def enqueue_send_parts(self, sender:int, parts:List[Union[bytes, bytearray, memoryview]]) -> Any:
+        """
+        Enqueues several buffers to be sent by a sender thread as one message, without joining them.
+        Like enqueue_send(), this blocks while capacity messages are still waiting to be sent.
+
+        Args:
+            sender: The handle of the sender thread.
+            parts: The buffers that make up the message, in order.
+
+        Returns:
+            The pointers to the buffers, which must be kept alive until wait_send() reports that the message has been sent.
+        """
+        data_pointers, data_lengths = zip(*[self._byte_pointer(part) for part in parts])
+        part_pointers = (c_void_p * len(parts))(*[cast(data_pointer, c_void_p).value for data_pointer in data_pointers])
+        part_lengths = (c_int * len(parts))(*data_lengths)
+        self.__enqueue_send_parts(sender, part_pointers, part_lengths, len(parts))
+        return data_pointers
+
+    def wait_send(self, sender:int, count:int) -> None:
+        """
+        Waits until a sender thread has sent at least the given number of messages.
+
+        Args:
+            sender: The handle of the sender thread.
+            count: The number of messages.
+
+        Returns:
+            None
+        """
+        self.__wait_send(sender, count)
+
+    def stop_sender_thread(self, sender:int) -> None:
+        """
+        Stops a sender thread after it has sent all the enqueued data and releases it.
+
+        Args:
+            sender: The handle of the sender thread.
+
+        Returns:
+            None
+        """
+        self.__stop_sender_thread(sender)
+
+    def _recv(self, source:int, tag:int) -> bytearray:
+        # MPI writes the message straight into a Python-owned buffer, so no C-side copy has to be made and freed.
+        data_buffer_size = self.__probe(self.__mpi_communication, source, tag)
+        recvdata = bytearray(data_buffer_size)
+        self.__recv_into(self.__mpi_communication, source, tag, (c_char * data_buffer_size).from_buffer(recvdata), data_buffer_size)
         return recvdata
+
+    def _recv_object(self, source:int, tag:int) -> Any:
+        header = self._recv(source, tag)
+        (buffer_count,) = struct.unpack_from('<I', header)
+        out_of_band_buffers = [self._recv(source, tag) for _ in range(buffer_count)]
+        return pickle.loads(memoryview(header)[4:], buffers=out_of_band_buffers)
     
-    def recv(self, source:int, tag:int, deserialize=True) -> Union[bytes, Any]:
+    def recv(self, source:int, tag:int, deserialize=True) -> Union[bytearray, Any]:
         """
         Receives data via MPI communication.
 
@@ -166,28 +411,129 @@ class MPI:
             source: The source rank number.
             tag: The tag for message identification.
             deserialize: Whether to deserialize the received data. Default is True.
+                False is the fast path for data sent with send_bytes(); the message is returned as is without unpickling.
 
         Returns:
-            The received data as bytes or deserialized object.
+            The received data as a bytearray or deserialized object.
         """
         if deserialize:
-            return pickle.loads(self._recv(source, tag))
+            return self._recv_object(source, tag)
         return self._recv(source, tag)
     
+    def recv_all(self, sources:List[int], tag:int) -> List[bytearray]:
+        """
+        Receives one message from each of the given sources via MPI communication.
+        All receives are posted at once and completed together, so the messages are transferred concurrently.
+
+        Args:
+            sources: The source rank numbers.
+            tag: The tag for message identification.
+
+        Returns:
+            The received data as bytearrays, in the order of sources.
+        """
+        source_count = len(sources)
+        source_array = (c_int * source_count)(*sources)
+        data_buffer_sizes = (c_int * source_count)()
+        self.__probe_all(self.__mpi_communication, source_array, source_count, tag, data_buffer_sizes)
+
+        recvdata = [bytearray(size) for size in data_buffer_sizes]
+        data_buffers = [(c_char * len(data)).from_buffer(data) for data in recvdata]
+        data_pointers = (c_void_p * source_count)(*[addressof(data_buffer) for data_buffer in data_buffers])
+        self.__recv_all_into(self.__mpi_communication, source_array, source_count, tag, data_pointers, data_buffer_sizes)
+        del data_buffers
+        return recvdata
+
+    def irecv_all(self, sources:List[int], tag:int) -> Tuple[List[bytearray], int]:
+        """
+        Posts one receive from each of the given sources via MPI communication without waiting for them.
+        The sources are probed in order, and each probe blocks until the message of that source has arrived, so posting
+        the receive of a later source waits for the earlier ones; only the transfers themselves overlap once posted.
+        The received data must not be used before wait_all() has returned for the returned requests.
+
+        Args:
+            sources: The source rank numbers.
+            tag: The tag for message identification.
+
+        Returns:
+            The buffers the data is received into, in the order of sources, and the handle of the posted requests.
+        """
+        requests = self.__create_requests(len(sources))
+        recvdata = []
+        for index, source in enumerate(sources):
+            data_buffer_size = self.__probe(self.__mpi_communication, source, tag)
+            data = bytearray(data_buffer_size)
+            self.__irecv_into(self.__mpi_communication, source, tag, (c_char * data_buffer_size).from_buffer(data), data_buffer_size, requests, index)
+            recvdata.append(data)
+        return recvdata, requests
+
+    def wait_all(self, requests:int, count:int) -> None:
+        """
+        Waits until the requests posted by irecv_all() have completed and releases them.
+
+        Args:
+            requests: The handle of the posted requests.
+            count: The number of posted requests.
+
+        Returns:
+            None
+        """
+        self.__wait_all(self.__mpi_communication, requests, count)
+
+    def broadcast_int(self, value:int, root:int=0) -> int:
+        """
+        Broadcasts an integer from the root rank to all ranks via MPI communication.
+        All ranks must call this function.
+
+        Args:
+            value: The integer to be broadcast. It is only used on the root rank.
+            root: The rank number of the root. Default is 0.
+
+        Returns:
+            The integer of the root rank.
+        """
+        data = c_int(value)
+        self.__broadcast_int(self.__mpi_communication, byref(data), root)
+        return data.value
+
+    def broadcast_bytes(self, data:Optional[bytes], root:int=0) -> bytes:
+        """
+        Broadcasts bytes from the root rank to all ranks via MPI communication.
+        All ranks must call this function.
+
+        Args:
+            data: The bytes to be broadcast. It is only used on the root rank.
+            root: The rank number of the root. Default is 0.
+
+        Returns:
+            The bytes of the root rank.
+        """
+        data_length = self.broadcast_int(len(data) if self.rank == root else 0, root)
+        data_buffer = bytearray(data) if self.rank == root else bytearray(data_length)
+        self.__broadcast_bytes(self.__mpi_communication, (c_char * data_length).from_buffer(data_buffer), data_length, root)
+        return bytes(data_buffer)
+
     def make_sharding_rank(self) -> int:
         """
         Collects and organizes rank numbers for sharding.
+        Only the first process of each training node (local rank 0) becomes a sharding rank, so every node sends
+        its shard to the remote node in a single message and the remote node receives one message per node.
+
+        The ranks are collected with a collective call on the first call only; later calls return the cached result.
 
         Returns:
             The number of ranks involved in sharding.
         """
+        if self.sharding_rank_list is not None:
+            return len(self.sharding_rank_list)
+
         array_type = c_int * self.size
         localRank = array_type ()
         my_local_rank = c_int(int(os.environ["OMPI_COMM_WORLD_LOCAL_RANK"]))
         self.__all_gather_int(self.__mpi_communication, byref(my_local_rank), 1, localRank, 1)
         localRankList = [i for i in localRank]
         sharding_rank_list = []
-        for i in range(self.size-1):
+        for i in range(self.remote_rank):
             if localRankList[i] == 0:
                 sharding_rank_list.append(i)
 
@@ -254,78 +600,208 @@ class TRAIN:
             shard_rank (int): The rank of the current shard.
             shard_size (int): The total number of shards.
             sender_enqueue (Callable[[Any], None]): The function to enqueue data in Sender.
+            checkpoint_format (str): The format of the dump. 'torch' uses torch.save, 'raw' uses the raw tensor format.
+            checkpoint_dtype (Optional[str]): The dtype that floating point tensors are stored as in the raw tensor format.
+                'bfloat16' and 'float16' downcast wider tensors, 'int8' quantizes them with a per-tensor absmax scale.
+            shard_compression (bool): Whether to compress each shard with LZ4 before it is sent.
         """
 
+        class __DumpBufferClass(io.RawIOBase):
+            """
+            __DumpBufferClass is a write-only byte stream that torch.save dumps the model data into.
+            Unlike io.BytesIO, its memory is reserved up front from a size hint and is not zero-filled,
+            so a dump of the expected size is written without any resizing copies.
+
+            Args:
+                size_hint (int): The expected size of the dump in bytes.
+            """
+
+            def __init__(self, size_hint: int):
+                super().__init__()
+                self.__memory = mmap.mmap(-1, max(size_hint, mmap.PAGESIZE))
+                self.__size = 0
+
+            def writable(self) -> bool:
+                return True
+
+            def tell(self) -> int:
+                return self.__size
+
+            def write(self, data) -> int:
+                data = memoryview(data).cast('B')
+                end = self.__size + data.nbytes
+                if end > len(self.__memory):
+                    # Grow geometrically, as io.BytesIO does, when the size hint was too small
+                    memory = mmap.mmap(-1, max(end, 2*len(self.__memory)))
+                    with memoryview(self.__memory) as previous_memory:
+                        memory[:self.__size] = previous_memory[:self.__size]
+                    self.__memory.close()
+                    self.__memory = memory
+                self.__memory[self.__size:end] = data
+                self.__size = end
+                return data.nbytes
+
+            def getbuffer(self) -> memoryview:
+                """
+                Get the dumped data without copying it.
+
+                Returns:
+                    memoryview: The dumped data.
+                """
+                return memoryview(self.__memory)[:self.__size]
+
         def __init__(
             self,
             save_count: int,
             shard_rank: int,
             shard_size: int,
-            sender_enqueue: Callable[[Any], None]
+            sender_enqueue: Callable[[Any], None],
+            checkpoint_format: str = 'torch',
+            checkpoint_dtype: Optional[str] = None,
+            shard_compression: bool = False,
         ):
             self.__save_count = save_count
             self.__shard_rank = shard_rank
             self.__shard_size = shard_size
             self.__Sender_enqueue = sender_enqueue
+            self.__checkpoint_format = checkpoint_format
+            self.__checkpoint_dtype = None if checkpoint_dtype is None else getattr(torch, checkpoint_dtype)
+            self.__shard_compression = shard_compression
             
             self.__thread = threading.Thread(target=self.__method, args=())
             self.__copy_lock = threading.Lock()
-            self.__copy_completed = True
-            self.__buffer = None
+            self.__requests = queue.Queue()
+            # The number of requested, copied and dumped model data, guarded by __progress
+            self.__progress = threading.Condition()
+            self.__request_count = 0
+            self.__copy_count = 0
+            self.__dump_count = 0
+            self.__dump_size_hint = 0
 
         def __method(self):
             for _ in range(self.__save_count):
-                while self.__buffer is None:
-                    time.sleep(0.01)
-
-                # Dump the model data to a byte buffer
-                byteBuffer = io.BytesIO()
-                torch.save(self.__buffer, byteBuffer)
-                self.__buffer = None
-
-                # Release the copy lock to allow model updates
-                with self.__copy_lock:
-                    self.__copy_completed = True
-
-                # Get the dumped data as bytes
-                dump = byteBuffer.getvalue()
-                del byteBuffer
-
-                def compute_shard(dump):
-                    """
-                    Compute the range of data to be used by the current shard.
-
-                    Args:
-                        dump (bytes): The dumped model data.
-
-                    Returns:
-                        left (int): The start index of the shard's data.
-                        right (int): The end index of the shard's data.
-                    """
-                    key_len = len(dump)
-                    compute_node_len = self.__shard_size
-                    q = int(key_len / compute_node_len)
-                    r = int(key_len % compute_node_len)
-                    rank = self.__shard_rank
-
-                    if rank+1 <= r:
-                        left = (rank)*(q+1)
-                        right = (rank+1)*(q+1)-1
-                    else:
-                        left = (rank)*q+r
-                        right = (rank+1)*q+r-1
-                    return left, right
-                
+                obj, copy_event = self.__requests.get()
+
+                if copy_event is not None:
+                    # The model data has been copied to host memory, so the model can be updated while it is dumped
+                    copy_event.synchronize()
+                    self.__advance(copied=True)
+
+                if self.__checkpoint_format == 'raw':
+                    dump = self.__dump_raw(obj, self.__checkpoint_dtype)
+                else:
+                    # Dump the model data to a byte buffer sized after the previous dump
+                    byteBuffer = self.__DumpBufferClass(self.__dump_size_hint)
+                    torch.save(obj, byteBuffer)
+
+                    # Get the dumped data as a view over the byte buffer, so the shard can be sliced without copying
+                    dump = byteBuffer.getbuffer()
+                    self.__dump_size_hint = len(dump)
+                    del byteBuffer
+                del obj
+
+                # Signal the copy completion to allow model updates
+                self.__advance(copied=copy_event is None, dumped=True)
+
                 # Get the data range for the current shard
-                left, right = compute_shard(dump)
+                left, right = self.__compute_shard(len(dump), self.__shard_size, self.__shard_rank)
                 if left<=right:
                     dump = dump[left:right+1]
                 else:
                     dump = bytes()
+
+                if self.__shard_compression:
+                    # The fastest LZ4 level keeps the Copier ahead of the network while sending fewer bytes
+                    dump = lz4.frame.compress(dump, compression_level=0)
                 
                 # Enqueue the data in Sender
                 self.__Sender_enqueue(dump)
 
+        @staticmethod
+        def __dump_raw(obj, checkpoint_dtype=None) -> memoryview:
+            """
+            Dump the model data in the raw tensor format, which can be loaded with load_checkpoint().
+            Only the structure around the tensors is pickled; each tensor is copied once,
+            straight from its device into its place in a buffer allocated for the entire dump.
+
+            Args:
+                obj (Any): The model data to be dumped.
+                checkpoint_dtype (Optional[torch.dtype]): The dtype that floating point tensors are stored as.
+
+            Returns:
+                memoryview: The dumped data.
+            """
+            tensors = []
+            tensor_table = []
+            data_size = 0
+            checkpoint_itemsize = None if checkpoint_dtype is None else torch.empty(0, dtype=checkpoint_dtype).element_size()
+
+            def persistent_id(value):
+                nonlocal data_size
+                if not isinstance(value, torch.Tensor):
+                    return None
+                tensor = value.detach().contiguous()
+                dtype = tensor.dtype
+                scale = None
+                # Scalars such as the optimizer step are kept exact; the rest is converted on the tensor's device,
+                # so less data is copied to the host as well
+                if checkpoint_itemsize is not None and tensor.dim() > 0 and tensor.is_floating_point() and tensor.element_size() > checkpoint_itemsize:
+                    if checkpoint_dtype == torch.int8:
+                        scale = tensor.abs().max().item()/127 if tensor.numel() > 0 else 0.0
+                        scale = scale if scale > 0 else 1.0
+                        tensor = torch.round(tensor/scale).clamp_(-127, 127).to(torch.int8)
+                    else:
+                        tensor = tensor.to(checkpoint_dtype)
+                nbytes = tensor.numel() * tensor.element_size()
+                tensor_table.append((dtype, tuple(tensor.shape), data_size, nbytes, tensor.dtype, scale))
+                tensors.append(tensor)
+                data_size += -(-nbytes // _RAW_CHECKPOINT_ALIGNMENT) * _RAW_CHECKPOINT_ALIGNMENT
+                return len(tensors)-1
+
+            structure = io.BytesIO()
+            pickler = pickle.Pickler(structure, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.persistent_id = persistent_id
+            pickler.dump(obj)
+            header = pickle.dumps((tensor_table, structure.getvalue()), protocol=pickle.HIGHEST_PROTOCOL)
+            del structure
+
+            header_size = len(_RAW_CHECKPOINT_MAGIC) + 8 + len(header)
+            data_offset = -(-header_size // _RAW_CHECKPOINT_ALIGNMENT) * _RAW_CHECKPOINT_ALIGNMENT
+            memory = mmap.mmap(-1, max(data_offset + data_size, mmap.PAGESIZE))
+            memory[:header_size] = _RAW_CHECKPOINT_MAGIC + struct.pack('<Q', len(header)) + header
+
+            view = memoryview(memory)
+            for tensor, (_, _, offset, nbytes, _, _) in zip(tensors, tensor_table):
+                if nbytes > 0:
+                    destination = torch.frombuffer(view, dtype=torch.uint8, count=nbytes, offset=data_offset+offset)
+                    destination.copy_(tensor.reshape(-1).view(torch.uint8))
+                    del destination
+            return view[:data_offset + data_size]
+
+        @staticmethod
+        def __compute_shard(dump_size: int, shard_size: int, shard_rank: int):
+            """
+            Compute the range of data to be used by the current shard.
+
+            Args:
+                dump_size (int): The size of the dumped model data.
+                shard_size (int): The total number of shards.
+                shard_rank (int): The rank of the current shard.
+
+            Returns:
+                left (int): The start index of the shard's data.
+                right (int): The end index of the shard's data.
+            """
+            q, r = divmod(dump_size, shard_size)
+
+            if shard_rank < r:
+                left = shard_rank*(q+1)
+                right = left+q
+            else:
+                left = shard_rank*q+r
+                right = left+q-1
+            return left, right
+
         def is_copy_complete(self):
             """
             Check if the copying process is complete.
@@ -333,29 +809,52 @@ class TRAIN:
             Returns:
                 bool: True if the copying process is complete, False otherwise.
             """
-            return self.__copy_completed
+            with self.__progress:
+                return self.__copy_count == self.__request_count
 
         def wait_copy_complete(self):
             """
             Wait until the copying process is complete.
             """
-            if self.__copy_completed:
-                return
-            while not self.__copy_completed:
-                time.sleep(0.01)
+            with self.__progress:
+                self.__progress.wait_for(lambda: self.__copy_count == self.__request_count)
+
+        def wait_dump_complete(self, count: Optional[int] = None):
+            """
+            Wait until the requested model data has been dumped.
 
-        def request(self, obj):
+            Args:
+                count (Optional[int]): The number of requests that must have been dumped. Defaults to all of them.
+            """
+            with self.__progress:
+                if count is None:
+                    count = self.__request_count
+                self.__progress.wait_for(lambda: self.__dump_count >= count)
+
+        def __advance(self, copied: bool = False, dumped: bool = False):
+            with self.__progress:
+                self.__copy_count += copied
+                self.__dump_count += dumped
+                self.__progress.notify_all()
+
+        def request(self, obj, copy_event=None):
             """
             Request to copy the model data.
 
             Args:
                 obj (Any): The model data to be copied.
+                copy_event (Optional[torch.cuda.Event]): The event recorded after obj was copied to host memory.
+                    If given, the copy is marked complete as soon as the event has completed instead of after dumping,
+                    and the request is queued behind the model data that is still being dumped. The caller must not reuse
+                    obj before wait_dump_complete() has returned for it.
             """
-            self.wait_copy_complete()
             with self.__copy_lock:
-                if self.is_copy_complete(): # Double check if copying is complete
-                    self.__is_copy_complete = False
-                    self.__buffer = obj
+                if copy_event is None:
+                    # obj is the live model data, so it is only taken once the previous model data has been dumped
+                    self.wait_dump_complete()
+                with self.__progress:
+                    self.__request_count += 1
+                self.__requests.put((obj, copy_event))
 
         def start(self):
             """
@@ -368,32 +867,105 @@ class TRAIN:
         __SenderClass represents the Sender module.
         It transmits the data using MPI.
 
+        The data is sent by a sender thread inside the MPI module, so the sends run without the GIL.
+        Shards are handed to it through a bounded single-producer single-consumer ring, so at most
+        _SEND_QUEUE_CAPACITY shards are held in memory while waiting to be sent.
+        A Python thread only waits for each send to complete and then releases the reference to its data.
+
+        If max_batch_bytes is positive, consecutive shards waiting in the queue are coalesced into one MPI message
+        until the batch reaches max_batch_bytes, waiting at most max_batch_delay seconds for further shards.
+        A batched message starts with a header holding the number of shards and their sizes.
+
         Args:
             save_count (int): The number of times to perform the sending process.
             MPI (MPI): The MPI object for communication.
+            max_batch_bytes (int): The size at which a batch of shards is sent. 0 disables batching.
+            max_batch_delay (float): The maximum time in seconds to wait for further shards of a batch.
         """
 
         def __init__(
             self,
             save_count:int,
             MPI:MPI,
+            max_batch_bytes:int = 0,
+            max_batch_delay:float = 0.0,
         ):
-            self.__thread = threading.Thread(target=self.__method, args=())
+            self.__batch_thread = threading.Thread(target=self.__batch_method, args=())
+            self.__completion_thread = threading.Thread(target=self.__completion_method, args=())
             self.__queue = queue.Queue()
+            self.__in_flight = queue.Queue()
             self.__save_count = save_count
+            self.__enqueue_count = 0
             self.__MPI = MPI
-
-        def __method(self):
-            for _ in range(self.__save_count):
-                data = self.__queue.get()
-                self.__MPI.send(data=data, dest=self.__MPI.size-1, tag=0)
+            self.__max_batch_bytes = max_batch_bytes
+            self.__max_batch_delay = max_batch_delay
+            self.__sender_thread = None
+
+        def __batch_method(self):
+            remaining_count = self.__save_count
+            while remaining_count > 0:
+                batch = self.__get_batch(self.__queue.get(), remaining_count)
+                header = struct.pack(f'<I{len(batch)}Q', len(batch), *[len(shard) for shard in batch])
+                remaining_count -= len(batch)
+                # The header and the shards are sent as one message straight from their own buffers, so they are never joined
+                self.__in_flight.put(self.__MPI.enqueue_send_parts(self.__sender_thread, [header, *batch]))
+                del batch
+            self.__in_flight.put(None)
+
+        def __completion_method(self):
+            sent_count = 0
+            while True:
+                data = self.__in_flight.get()
+                if data is None:
+                    break
+                sent_count += 1
+                self.__MPI.wait_send(self.__sender_thread, sent_count)
                 del data
+            self.__MPI.stop_sender_thread(self.__sender_thread)
+
+        def __post(self, data):
+            """
+            Hand data over to the sender thread and keep it alive until it has been sent.
+
+            Args:
+                data (Any): The data to be sent.
+            """
+            self.__in_flight.put(self.__MPI.enqueue_send(self.__sender_thread, data))
+
+        def __get_batch(self, data, remaining_count: int) -> list:
+            """
+            Collect the shards to be sent together with the given one.
+
+            Args:
+                data (Any): The first shard of the batch.
+                remaining_count (int): The number of shards that are still to be sent.
+
+            Returns:
+                list: The shards of the batch.
+            """
+            batch = [data]
+            batch_bytes = len(data)
+            deadline = time.monotonic() + self.__max_batch_delay
+            while len(batch) < remaining_count and batch_bytes < self.__max_batch_bytes:
+                try:
+                    data = self.__queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(data)
+                batch_bytes += len(data)
+            return batch
 
         def start(self):
             """
             Start the Sender thread.
             """
-            self.__thread.start()
+            self.__sender_thread = self.__MPI.start_sender_thread(dest=self.__MPI.remote_rank, tag=0, capacity=_SEND_QUEUE_CAPACITY)
+            self.__completion_thread.start()
+            if self.__max_batch_bytes > 0:
+                self.__batch_thread.start()
+            elif self.__save_count == 0:
+                # Nothing will be enqueued, so the completion thread is told to stop right away
+                self.__in_flight.put(None)
         
         def enqueue(self, data):
             """
@@ -402,23 +974,43 @@ class TRAIN:
             Args:
                 data (Any): The data to be sent.
             """
-            self.__queue.put(data)
+            if self.__max_batch_bytes > 0:
+                self.__queue.put(data)
+                return
+
+            self.__post(data)
+            self.__enqueue_count += 1
+            if self.__enqueue_count == self.__save_count:
+                self.__in_flight.put(None)
 
     def __init__(
         self,
         MPI: MPI,
         save_count: int,
         shard_rank: int,
-        shard_size: int
+        shard_size: int,
+        max_batch_bytes: int = 0,
+        max_batch_delay: float = 0.0,
+        async_copy: bool = False,
+        checkpoint_format: str = 'torch',
+        checkpoint_dtype: Optional[str] = None,
+        shard_compression: bool = False,
     ):
+        _import_torch()
         self.__MPI = MPI
         self.__save_count = save_count
         self.__shard_rank = shard_rank
         self.__shard_size = shard_size
-        self.__Sender = self.__SenderClass(self.__save_count, self.__MPI)
-        self.__Copier = self.__CopierClass(self.__save_count, self.__shard_rank, self.__shard_size, self.__Sender.enqueue)
+        self.__Sender = self.__SenderClass(self.__save_count, self.__MPI, max_batch_bytes, max_batch_delay)
+        self.__Copier = self.__CopierClass(self.__save_count, self.__shard_rank, self.__shard_size, self.__Sender.enqueue, checkpoint_format, checkpoint_dtype, shard_compression)
         self.__is_running = False
 
+        # With async_copy, GPU tensors are copied into pinned host memory on a separate CUDA stream before dumping
+        self.__copy_stream = torch.cuda.Stream() if async_copy and torch.cuda.is_available() else None
+        # Two sets of pinned tensors are used in turn, so one can be filled while the other is still being dumped
+        self.__pinned_tensors = [[], []]
+        self.__save_index = 0
+
     def start(self):
         """
         Start the TRAIN node.
@@ -435,13 +1027,67 @@ class TRAIN:
     def save(self, obj):
         """
         Request to save the model data.
+        If the model data is a dict with an 'epoch' entry, the epoch is also written to a metadata file next to the
+        checkpoint file, so a later init_ACUTE can resume from the checkpoint without loading it.
 
         Args:
             obj (Any): The model data to be saved.
         """
         assert self.__is_running, "You have not started the module yet. Please start the module first using init_ACUTE() or start()."
-        if self.__shard_rank >= 0:
-            self.__Copier.request(obj)
+        if self.__shard_rank == 0:
+            # The metadata goes ahead of the shards on its own tag, so the remote node can write it next to the file
+            epoch = obj.get('epoch') if isinstance(obj, dict) else None
+            self.__MPI.send_obj({'epoch': epoch} if isinstance(epoch, int) else None, dest=self.__MPI.remote_rank, tag=1)
+        if self.__shard_rank>=0 and self.__shard_rank<self.__shard_size:
+            if self.__copy_stream is None:
+                self.__Copier.request(obj)
+                return
+
+            # A set of pinned tensors is reused every other save, so the model data saved before the previous one
+            # has to be dumped before they are overwritten
+            pinned_tensors = self.__pinned_tensors[self.__save_index % 2]
+            self.__Copier.wait_dump_complete(self.__save_index - 1)
+            self.__save_index += 1
+            self.__copy_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(self.__copy_stream):
+                pinned_obj = self.__copy_to_pinned_memory(obj, pinned_tensors, [0])
+                copy_event = torch.cuda.Event()
+                copy_event.record(self.__copy_stream)
+            self.__Copier.request(pinned_obj, copy_event)
+
+    def __copy_to_pinned_memory(self, obj, pinned_tensors: list, tensor_index: list):
+        """
+        Copy the tensors in the model data to pinned host memory asynchronously.
+        The pinned tensors are allocated on the first save and reused as long as the tensors keep their shape and dtype.
+
+        Args:
+            obj (Any): The model data to be copied. Dicts, lists and tuples are traversed recursively.
+            pinned_tensors (list): The set of pinned tensors to copy into. It is extended as new tensors are found.
+            tensor_index (list): A single-element list holding the index of the next pinned tensor.
+
+        Returns:
+            Any: The model data whose tensors are replaced with their pinned host copies.
+        """
+        if isinstance(obj, torch.Tensor):
+            index = tensor_index[0]
+            tensor_index[0] += 1
+            if index == len(pinned_tensors):
+                pinned_tensors.append(None)
+            pinned_tensor = pinned_tensors[index]
+            if pinned_tensor is None or pinned_tensor.shape != obj.shape or pinned_tensor.dtype != obj.dtype:
+                pinned_tensor = torch.empty(obj.shape, dtype=obj.dtype, device='cpu', pin_memory=True)
+                pinned_tensors[index] = pinned_tensor
+            pinned_tensor.copy_(obj.detach(), non_blocking=True)
+            return pinned_tensor
+        if isinstance(obj, dict):
+            # A shallow copy keeps the dict type and attributes such as the state_dict _metadata
+            pinned_obj = copy.copy(obj)
+            for key, value in obj.items():
+                pinned_obj[key] = self.__copy_to_pinned_memory(value, pinned_tensors, tensor_index)
+            return pinned_obj
+        if type(obj) in (list, tuple):
+            return type(obj)(self.__copy_to_pinned_memory(value, pinned_tensors, tensor_index) for value in obj)
+        return obj
 
     def waiting_for_copying(self):
         """
@@ -458,78 +1104,28 @@ class REMOTE:
 
     The remote node consists of four components:
     a. Buffer: Stores multiple data samples using a circular queue-like structure to prevent bottlenecks during flushing when the write speed is slower than the data receiving speed.
-    b. Receivers: Multiple receivers simultaneously receive sharded data from training nodes based on shard ranks and store it in the buffer.
-    c. Flusher: Joins the sharded data in the buffer and writes it to files. It works in parallel with the receivers.
-    d. Master: Manages the buffer, dirty bits, and coordination between the receivers and flusher.
+    b. Receiver: Receives the sharded data from all training nodes, based on shard ranks, and stores it in the buffer.
+       The receives for a buffer are posted as soon as it is clean and completed on a separate thread, so several buffers can be in flight.
+    c. Flusher: Writes the sharded data in the buffer to files in shard order. It works in parallel with the receiver.
+    d. Master: Manages the buffer, dirty bits, and coordination between the receiver and flusher.
 
-    The REMOTE class instantiates the Receiver, Flusher, and Master as sub-classes and provides simple functions for users without exposing the internal structure.
+    The REMOTE class instantiates the Flusher as a sub-class, acts as the Receiver and Master itself, and provides simple functions for users without exposing the internal structure.
     """
-    class __ReceiverClass:
-        """
-        ReceiverClass represents the Receiver module that receives data from training nodes and stores it in the buffer.
-
-        Args:
-            MPI (MPI): The MPI object for communication.
-            rank (int): The rank of the receiver.
-            save_count (int): The number of times to perform the receive operation.
-            remote_buffer (list): The remote buffer to store the received data.
-            get_remote_buffer_current_index_func (Callable[[], int]): The function to get the current index of the remote buffer.
-        """
-
-        def __init__(
-            self,
-            MPI: MPI,
-            rank: int,
-            save_count: int,
-            remote_buffer: list,
-            get_remote_buffer_current_index_func: Callable[[], int]
-        ):
-            self.__MPI = MPI
-            self.__rank = rank
-            self.__save_count = save_count
-            self.__remote_buffer = remote_buffer
-            self.__get_remote_buffer_current_index = get_remote_buffer_current_index_func
-            self.__start_event = threading.Event()
-            self.__end_event = threading.Event()
-            self.__thread = threading.Thread(target=self.__method, args=())
-
-        def __method(self):
-            for _ in range(self.__save_count):
-                self.__start_event.wait()
-                self.__start_event.clear()
-                remote_buffer_index = self.__get_remote_buffer_current_index()
-                received_data = self.__MPI.recv(source=self.__MPI.sharding_rank_list[self.__rank], tag=0, deserialize=False)
-                self.__remote_buffer[remote_buffer_index][self.__rank] = received_data
-                self.__end_event.set()
-
-        def start(self):
-            """
-            Start the Receiver thread.
-            """
-            self.__thread.start()
-
-        def request(self):
-            """
-            Send a request to the Receiver to start receiving data.
-            """
-            self.__start_event.set()
-        
-        def wait(self):
-            """
-            Wait until the Receiver has finished receiving data.
-            """
-            self.__end_event.wait()
-            self.__end_event.clear()
-        
     class __FlusherClass:
         """
-        FlusherClass represents the Flusher module that joins the data in the buffer and writes it to files.
+        FlusherClass represents the Flusher module that writes the sharded data in the buffer to files.
+        Each written file is synced to disk by a separate sync thread, so the next buffer can be written in the meantime.
 
         Args:
             save_count (int): The number of times to perform the flush operation.
             remote_buffer (list): The remote buffer that contains the data to be flushed.
             clear_dirty_bit_func (Callable[[int], None]): The function to clear the dirty bit for a specific buffer index.
-            get_file_name_func (Callable[[], str]): The function to get the file name for writing the data.
+            get_file_name_func (Callable[[Optional[dict]], str]): The function to get the file name for writing the data
+                from its metadata.
+            shard_compression (bool): Whether the shards are compressed with LZ4 and have to be decompressed before writing.
+            remote_metadata (Optional[list]): The metadata of the data in each buffer, written next to the file as
+                '<file>.meta.json' once the file is durable. The metadata file is removed before its file is overwritten,
+                so files written from buffers without metadata have no metadata file.
         """
 
         def __init__(
@@ -537,37 +1133,93 @@ class REMOTE:
             save_count: int,
             remote_buffer: list,
             clear_dirty_bit_func: Callable[[int],None],
-            get_file_name_func: Callable[[],str]
+            get_file_name_func: Callable[[Optional[dict]],str],
+            shard_compression: bool = False,
+            remote_metadata: Optional[list] = None,
         ):
             self.__save_count = save_count
             self.__remote_buffer = remote_buffer
+            self.__remote_metadata = remote_metadata
+            self.__metadata_lock = threading.Lock()
+            self.__latest_save_index = {}
             self.__queue = queue.Queue()
+            self.__sync_queue = queue.Queue()
             self.__thread = threading.Thread(target=self.__method, args=())
+            self.__sync_thread = threading.Thread(target=self.__sync_method, args=())
             self.__clear_dirty_bit = clear_dirty_bit_func
             self.__get_file_name = get_file_name_func
+            self.__shard_compression = shard_compression
         
         def __method(self):
-            for _ in range(self.__save_count):
+            for save_index in range(self.__save_count):
                 remote_buffer_index = self.__queue.get()
-                entire_recv_data = b''.join(self.__remote_buffer[remote_buffer_index])
-                
-                self.__clear_dirty_bit(remote_buffer_index)
                 
-                file_path_name = self.__get_file_name()
+                file_path_name = self.__get_file_name(None if self.__remote_metadata is None else self.__remote_metadata[remote_buffer_index])
+
+                # The metadata of the earlier data in this file is removed before the file is overwritten,
+                # and a metadata file still being written for it by the sync thread is skipped
+                with self.__metadata_lock:
+                    self.__latest_save_index[file_path_name] = save_index
+                    try:
+                        os.remove(file_path_name + _SNAPSHOT_METADATA_SUFFIX)
+                    except FileNotFoundError:
+                        pass
                 
-                with open(file_path_name, 'wb') as f:
-                    f.write(entire_recv_data)
-                    f.flush()
-                    os.fsync(f.fileno())
-                    f.close()
+                # Write the shards one after another instead of joining them, so the entire data is never copied
+                f = open(file_path_name, 'wb')
+                for shard in self.__remote_buffer[remote_buffer_index]:
+                    f.write(lz4.frame.decompress(shard) if self.__shard_compression else shard)
+                f.flush()
+
+                # Hand the file over to the sync thread, so the next buffer can be written while this one is synced
+                self.__sync_queue.put((remote_buffer_index, save_index, f))
+
+        def __sync_method(self):
+            for _ in range(self.__save_count):
+                remote_buffer_index, save_index, f = self.__sync_queue.get()
+                os.fsync(f.fileno())
+                f.close()
+
+                # The metadata lets init_ACUTE resume from this file without loading it
+                metadata = None if self.__remote_metadata is None else self.__remote_metadata[remote_buffer_index]
+                with self.__metadata_lock:
+                    if self.__latest_save_index[f.name] == save_index:
+                        del self.__latest_save_index[f.name]
+                        if metadata is not None:
+                            self.__write_metadata(f.name + _SNAPSHOT_METADATA_SUFFIX, metadata)
+
+                # The buffer slot is only released after its shards are durable
+                self.__clear_dirty_bit(remote_buffer_index)
 
-                del entire_recv_data
+        @staticmethod
+        def __write_metadata(metadata_path: str, metadata: dict):
+            """
+            Write a metadata file atomically, so it is either missing or complete.
+
+            Args:
+                metadata_path (str): The path of the metadata file.
+                metadata (dict): The metadata to be written.
+            """
+            temporary_path = metadata_path + ".tmp"
+            with open(temporary_path, 'w') as metadata_file:
+                json.dump(metadata, metadata_file)
+                metadata_file.flush()
+                os.fsync(metadata_file.fileno())
+            os.replace(temporary_path, metadata_path)
 
         def start(self):
             """
-            Start the Flusher thread.
+            Start the Flusher threads.
             """
-            self.__thread.start()                
+            self.__thread.start()
+            self.__sync_thread.start()
+
+        def join(self):
+            """
+            Wait until the Flusher threads have written and synced all the data.
+            """
+            self.__thread.join()
+            self.__sync_thread.join()
 
         def enqueue(self, index: int):
             """
@@ -588,6 +1240,9 @@ class REMOTE:
         file_name_include_datetime: bool,
         # file_name_include_version: bool = False,
         file_save_in_dictionary: bool,
+        batched_shards: bool = False,
+        shard_compression: bool = False,
+        file_name_include_epoch: bool = False,
     ):
         """
         Initialize the REMOTE node.
@@ -600,6 +1255,9 @@ class REMOTE:
             model_name (str): The name of the model.
             file_name_include_datetime (bool): Whether to include the datetime in the file name.
             file_save_in_dictionary (bool): Whether to save the files in a separate directory.
+            batched_shards (bool): Whether the training nodes coalesce shards into batched messages.
+            shard_compression (bool): Whether the training nodes compress the shards with LZ4.
+            file_name_include_epoch (bool): Whether to include the epoch of the saved data in the file name.
         """
         self.__MPI = MPI
         self.__save_count = save_count
@@ -608,16 +1266,27 @@ class REMOTE:
         self.__model_name = model_name
         self.__file_name_include_datetime = file_name_include_datetime
         # self.__file_name_include_version = file_name_include_version
+        self.__file_name_include_epoch = file_name_include_epoch
         self.__file_save_in_dictionary = file_save_in_dictionary
+        self.__batched_shards = batched_shards
 
         self.__is_running = False
         self.__dirty_bits = [0]*self.__remote_buffer_size
-        self.__dirty_bits_lock = threading.Lock()
+        self.__dirty_bits_cv = threading.Condition()
         self.__remote_buffer = [[0 for _ in range(self.__SHARD_SIZE)] for _ in range(self.__remote_buffer_size)]
+        self.__remote_metadata = [None]*self.__remote_buffer_size
         self.__remote_buffer_index = 0
+        self.__receive_queue = queue.Queue()
+        self.__receive_thread = threading.Thread(target=self.__receive_method, args=())
+
+        self.__Flusher = self.__FlusherClass(self.__save_count, self.__remote_buffer, self.__clear_dirty_bit, self.__get_file_name_and_path, shard_compression, self.__remote_metadata)
 
-        self.__Receivers = [self.__ReceiverClass(self.__MPI, rank, self.__save_count, self.__remote_buffer, self.__get_remote_buffer_current_index) for rank in range(self.__SHARD_SIZE)]
-        self.__Flusher = self.__FlusherClass(self.__save_count, self.__remote_buffer, self.__clear_dirty_bit, self.__get_file_name_and_path)
+    def __receive_method(self):
+        for _ in range(self.__save_count):
+            remote_buffer_index, received_data, requests = self.__receive_queue.get()
+            self.__MPI.wait_all(requests, len(received_data))
+            self.__remote_buffer[remote_buffer_index] = received_data
+            self.__Flusher.enqueue(remote_buffer_index)
 
     def __get_remote_buffer_current_index(self):
         """
@@ -636,15 +1305,14 @@ class REMOTE:
     
     def __wait_dirty_bit(self, index: int):
         """
-        Wait until the dirty bit for a specific buffer index is cleared.
+        Wait until the dirty bit for a specific buffer index is cleared, then set it.
 
         Args:
             index (int): The buffer index to wait for.
         """
-        while True:
-            if self.__dirty_bits[index] == 0:
-                self.__set_dirty_bit(index)
-                break
+        with self.__dirty_bits_cv:
+            self.__dirty_bits_cv.wait_for(lambda: self.__dirty_bits[index] == 0)
+            self.__set_dirty_bit(index)
 
     def __set_dirty_bit(self, index: int):
         """
@@ -653,8 +1321,9 @@ class REMOTE:
         Args:
             index (int): The buffer index to set the dirty bit for.
         """
-        with self.__dirty_bits_lock:
+        with self.__dirty_bits_cv:
             self.__dirty_bits[index] = 1
+            self.__dirty_bits_cv.notify_all()
 
     def __clear_dirty_bit(self, index: int):
         """
@@ -663,19 +1332,46 @@ class REMOTE:
         Args:
             index (int): The buffer index to clear the dirty bit for.
         """
-        with self.__dirty_bits_lock:
+        with self.__dirty_bits_cv:
             self.__dirty_bits[index] = 0
+            self.__dirty_bits_cv.notify_all()
 
-    def __get_file_name_and_path(self) -> str:
+    @staticmethod
+    def __split_batch(data: bytearray) -> list:
+        """
+        Split a batched message from a training node into its shards.
+
+        Args:
+            data (bytearray): The batched message.
+
+        Returns:
+            list: The shards as memoryviews over the message.
+        """
+        view = memoryview(data)
+        (shard_count,) = struct.unpack_from('<I', view)
+        shard_sizes = struct.unpack_from(f'<{shard_count}Q', view, 4)
+        offset = 4 + 8*shard_count
+        shards = []
+        for shard_size in shard_sizes:
+            shards.append(view[offset:offset+shard_size])
+            offset += shard_size
+        return shards
+
+    def __get_file_name_and_path(self, metadata: Optional[dict] = None) -> str:
         """
         Get the file name and path for writing the data.
 
+        Args:
+            metadata (Optional[dict]): The metadata of the data, which holds its epoch if it is known.
+
         Returns:
             str: The file name and path.
         """
         fileName = "./" + str(self.__model_name)
         if self.__file_save_in_dictionary:
             fileName = "./" + self.__model_name+"/" + fileName
+        if self.__file_name_include_epoch and metadata is not None:
+            fileName = fileName + f"_ep{metadata['epoch']:08d}"
         if self.__file_name_include_datetime:
             fileName = fileName + "_" + datetime.now().strftime("%Y-%m-%d-%H%M%S") 
 
@@ -693,23 +1389,40 @@ class REMOTE:
             os.makedirs("./"+self.__model_name)
 
         self.__Flusher.start()
-        for Receiver in self.__Receivers:
-            Receiver.start()
+        if not self.__batched_shards:
+            self.__receive_thread.start()
+        shard_sources = self.__MPI.sharding_rank_list[:self.__SHARD_SIZE]
+        pending_shards = [deque() for _ in range(self.__SHARD_SIZE)]
 
         for _ in range(self.__save_count):
             target_buffer_index = self.__get_remote_buffer_current_index()
             self.__wait_dirty_bit(target_buffer_index)
-
-            for Receiver in self.__Receivers:
-                Receiver.request()
-            
-            for Receiver in self.__Receivers:
-                Receiver.wait()
-                
-            self.__Flusher.enqueue(target_buffer_index)
+            self.__remote_metadata[target_buffer_index] = self.__MPI.recv(source=shard_sources[0], tag=1)
+
+            if self.__batched_shards:
+                # Only receive from the training nodes whose previous batch has been used up
+                empty_ranks = [rank for rank in range(self.__SHARD_SIZE) if not pending_shards[rank]]
+                if empty_ranks:
+                    received_data = self.__MPI.recv_all(sources=[shard_sources[rank] for rank in empty_ranks], tag=0)
+                    for rank, data in zip(empty_ranks, received_data):
+                        pending_shards[rank].extend(self.__split_batch(data))
+                self.__remote_buffer[target_buffer_index] = [pending_shards[rank].popleft() for rank in range(self.__SHARD_SIZE)]
+                self.__Flusher.enqueue(target_buffer_index)
+            else:
+                # The receive thread completes the receives, so the next buffer can be posted while these are in flight
+                received_data, requests = self.__MPI.irecv_all(sources=shard_sources, tag=0)
+                self.__receive_queue.put((target_buffer_index, received_data, requests))
 
             self.__inc_remote_buffer_current_index()
 
+    def join(self):
+        """
+        Wait until all the received data has been written and synced to files.
+        """
+        if not self.__batched_shards:
+            self.__receive_thread.join()
+        self.__Flusher.join()
+
 def __init_remote_node(
     communicator: MPI,
     save_count: int,
@@ -718,6 +1431,9 @@ def __init_remote_node(
     model_name: str,
     file_name_include_datatime: bool,
     file_save_in_dictionary: bool,
+    batched_shards: bool,
+    shard_compression: bool,
+    file_name_include_epoch: bool,
 ):
     """
     Initialize the REMOTE node.
@@ -730,12 +1446,15 @@ def __init_remote_node(
         model_name (str): The name of the model.
         file_name_include_datetime (bool): Whether to include the datetime in the file name.
         file_save_in_dictionary (bool): Whether to save the files in a separate directory.
+        batched_shards (bool): Whether the training nodes coalesce shards into batched messages.
+        shard_compression (bool): Whether the training nodes compress the shards with LZ4.
+        file_name_include_epoch (bool): Whether to include the epoch of the saved data in the file name.
 
     Returns:
         REMOTE: The initialized REMOTE node.
     """
 
-    remote_node = REMOTE(communicator, save_count, remote_buffer_size, shard_size, model_name, file_name_include_datatime, file_save_in_dictionary)
+    remote_node = REMOTE(communicator, save_count, remote_buffer_size, shard_size, model_name, file_name_include_datatime, file_save_in_dictionary, batched_shards, shard_compression, file_name_include_epoch)
     return remote_node
 
 def __init_train_node(
@@ -744,6 +1463,12 @@ def __init_train_node(
     training_master_port: str,
     save_count: int,
     shard_size: int,
+    max_batch_bytes: int,
+    max_batch_delay: float,
+    async_copy: bool,
+    checkpoint_format: str,
+    checkpoint_dtype: Optional[str],
+    shard_compression: bool,
 ):
     """
     Initialize the TRAIN node.
@@ -754,15 +1479,23 @@ def __init_train_node(
         training_master_port (str): The port of the master node.
         save_count (int): The number of times to perform the save operation.
         shard_size (int): The number of shards.
+        max_batch_bytes (int): The size at which a batch of shards is sent. 0 disables batching.
+        max_batch_delay (float): The maximum time in seconds to wait for further shards of a batch.
+        async_copy (bool): Whether to copy GPU tensors to pinned host memory asynchronously before dumping.
+            Two sets of pinned tensors are used in turn, so a save can be copied while the previous one is dumped.
+        checkpoint_format (str): The format of the checkpoint files, 'torch' or 'raw'.
+        checkpoint_dtype (Optional[str]): The dtype that floating point tensors are stored as in the raw format.
+        shard_compression (bool): Whether to compress each shard with LZ4 before it is sent.
 
     Returns:
         TRAIN: The initialized TRAIN node.
     """
 
+    _import_torch()
     communicator.set_environ(training_master_address, training_master_port)
-    init_process_group (backend="nccl", rank=int(os.environ["RANK"]), world_size=int(os.environ["WORLD_SIZE"]))
+    torch.distributed.init_process_group (backend="nccl", rank=int(os.environ["RANK"]), world_size=int(os.environ["WORLD_SIZE"]))
     torch.cuda.set_device (int(os.environ["LOCAL_RANK"]))
-    train_node = TRAIN(communicator, save_count, int(os.environ["SHARD_RANK"]), shard_size)
+    train_node = TRAIN(communicator, save_count, int(os.environ["SHARD_RANK"]), shard_size, max_batch_bytes, max_batch_delay, async_copy, checkpoint_format, checkpoint_dtype, shard_compression)
     return train_node
 
 def calculate_save_count(
@@ -786,6 +1519,126 @@ def calculate_save_count(
     save_counts = len([point for point in save_points if point >= start_epoch])
     return save_counts
 
+def load_checkpoint(path: str, map_location=None, mmap_tensors: bool = False, weights_only: bool = False) -> Any:
+    """
+    Load a checkpoint file written by ACUTE.
+    Files in the raw tensor format are detected by their magic; any other file is loaded with torch.load.
+    Files ending in '.safetensors' are loaded with the safetensors package as a flat dict of tensors, which are always mapped.
+
+    Args:
+        path (str): The path of the checkpoint file.
+        map_location (Optional[Union[str, torch.device]]): The device to move the tensors to.
+        mmap_tensors (bool): Whether to map the tensor data from the file instead of reading it into memory.
+            The pages are only read when the tensors are accessed. Tensors that have to outlive the file, or be modified
+            without the changes being kept private to the process, should be cloned. Requires torch 2.1 or later for files
+            that are loaded with torch.load.
+        weights_only (bool): Whether torch.load only unpickles tensors, primitive types and dicts.
+            The header of the raw tensor format is a plain pickle, so raw files are refused when this is set.
+
+    Returns:
+        Any: The loaded model data.
+    """
+    _import_torch()
+    if path.endswith('.safetensors'):
+        if safetensors is None:
+            raise ImportError("Loading safetensors files requires the safetensors package. (pip install safetensors)")
+        with safetensors.safe_open(path, framework='pt', device='cpu' if map_location is None else str(map_location)) as f:
+            return {key: f.get_tensor(key) for key in f.keys()}
+
+    torch_load_options = {'weights_only': True} if weights_only else {}
+    with open(path, 'rb') as f:
+        is_raw_checkpoint = f.read(len(_RAW_CHECKPOINT_MAGIC)) == _RAW_CHECKPOINT_MAGIC
+        if not is_raw_checkpoint and not mmap_tensors:
+            f.seek(0)
+            return torch.load(f, map_location=map_location, **torch_load_options)
+
+        if is_raw_checkpoint:
+            if weights_only:
+                raise ValueError(f"The raw checkpoint \'{path}\' can't be loaded with weights_only, because its header is unpickled without restrictions.")
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            tensor_table, structure = pickle.loads(f.read(header_length))
+            header_size = len(_RAW_CHECKPOINT_MAGIC) + 8 + header_length
+            data_offset = -(-header_size // _RAW_CHECKPOINT_ALIGNMENT) * _RAW_CHECKPOINT_ALIGNMENT
+            if mmap_tensors:
+                # A private mapping is writable for torch.frombuffer without the changes reaching the file
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            else:
+                f.seek(data_offset)
+                data = bytearray(os.fstat(f.fileno()).st_size - data_offset)
+                f.readinto(data)
+                data_offset = 0
+
+    if not is_raw_checkpoint:
+        # torch.load can only map files that it opens itself
+        return torch.load(path, map_location=map_location, mmap=True, **torch_load_options)
+
+    tensors = []
+    for dtype, shape, offset, nbytes, stored_dtype, scale in tensor_table:
+        if nbytes > 0:
+            tensor = torch.frombuffer(data, dtype=torch.uint8, count=nbytes, offset=data_offset+offset).view(stored_dtype).reshape(shape)
+        else:
+            tensor = torch.empty(shape, dtype=stored_dtype)
+        if stored_dtype != dtype:
+            # Restore tensors that were downcast or quantized with checkpoint_dtype
+            tensor = tensor.to(dtype) if scale is None else tensor.to(dtype)*scale
+        if map_location is not None:
+            tensor = tensor.to(map_location)
+        tensors.append(tensor)
+
+    unpickler = pickle.Unpickler(io.BytesIO(structure))
+    unpickler.persistent_load = tensors.__getitem__
+    return unpickler.load()
+
+def __find_free_port() -> int:
+    """
+    Find a TCP port that is free on this host.
+
+    Returns:
+        int: The port number.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+def __read_snapshot_epoch(snapshot_path: str) -> int:
+    """
+    Read the epoch of a snapshot, from its file name or its metadata file if possible.
+    For safetensors files, an 'epoch' entry in the header metadata is used instead of loading the file.
+    Any other file is loaded with weights_only, so a raw checkpoint needs its epoch in its name or its metadata file.
+
+    Args:
+        snapshot_path (str): The path of the snapshot file.
+
+    Returns:
+        int: The epoch of the snapshot.
+    """
+    if not os.path.exists(snapshot_path):
+        raise FileNotFoundError(f"can't open file \'{snapshot_path}\': No such file or directory")
+
+    # Files named with file_name_include_epoch carry the epoch in their name, so nothing has to be read
+    epoch_match = _EPOCH_FILE_NAME_PATTERN.search(snapshot_path)
+    if epoch_match:
+        return int(epoch_match.group(1))
+
+    try:
+        with open(snapshot_path + _SNAPSHOT_METADATA_SUFFIX) as metadata_file:
+            return json.load(metadata_file)['epoch']
+    except FileNotFoundError:
+        pass
+
+    if snapshot_path.endswith('.safetensors'):
+        # The epoch is kept as a string in the metadata of the JSON header, so only the header is read
+        with open(snapshot_path, 'rb') as f:
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            metadata = json.loads(f.read(header_length)).get('__metadata__') or {}
+        if 'epoch' not in metadata:
+            raise ValueError(f"The safetensors file \'{snapshot_path}\' has no 'epoch' entry in its header metadata.")
+        return int(metadata['epoch'])
+
+    # Snapshots written without metadata are loaded; the tensors are mapped rather than read, so their pages are never touched
+    snapshot = load_checkpoint(snapshot_path, map_location='cpu', mmap_tensors=True, weights_only=True)
+    return snapshot['epoch']
+
 def init_ACUTE(args, train_node_auto_start=True, **overrides) -> MPI:
     """
     Initialize the ACUTE environment.
@@ -803,14 +1656,14 @@ def init_ACUTE(args, train_node_auto_start=True, **overrides) -> MPI:
         print("** ACUTE: (Warning) \'train_node_auto-start\' is false. is set to false. Please make sure to call train_node.start() before training. **")
 
     args_dict = vars(args)
-    valid_keys = set(args_dict.keys())
+    valid_keys = set(args_dict.keys()) | set(__optional_arguments.keys())
     for key in overrides:
         if key not in valid_keys:
             raise ValueError(f"Unexpected key: {key}")
     
     args_dict.update(overrides)    
-    training_master_address = args_dict['training_master_addr']
-    training_master_port = args_dict['training_master_port']
+    training_master_address = args_dict.get('training_master_addr', __optional_arguments['training_master_addr'])
+    training_master_port = args_dict.get('training_master_port', __optional_arguments['training_master_port'])
     total_epochs = args_dict['total_epochs']
     save_period = args_dict['save_period']
     starting_epoch = args_dict['starting_epoch']
@@ -820,29 +1673,80 @@ def init_ACUTE(args, train_node_auto_start=True, **overrides) -> MPI:
     file_save_in_dictionary = args_dict['file_save_in_dictionary']
     model_name = args_dict['model_name']
     snapshot_path = args_dict['snapshot_path']
-
+    max_batch_bytes = args_dict.get('max_batch_bytes', __optional_arguments['max_batch_bytes'])
+    max_batch_delay = args_dict.get('max_batch_delay', __optional_arguments['max_batch_delay'])
+    async_copy = args_dict.get('async_copy', __optional_arguments['async_copy'])
+    checkpoint_format = args_dict.get('checkpoint_format', __optional_arguments['checkpoint_format'])
+    if checkpoint_format not in ('torch', 'raw'):
+        raise ValueError(f"Unexpected checkpoint format: {checkpoint_format}")
+    checkpoint_dtype = args_dict.get('checkpoint_dtype', __optional_arguments['checkpoint_dtype'])
+    if checkpoint_dtype not in (None, 'bfloat16', 'float16', 'int8'):
+        raise ValueError(f"Unexpected checkpoint dtype: {checkpoint_dtype}")
+    if checkpoint_dtype is not None and checkpoint_format != 'raw':
+        raise ValueError("checkpoint_dtype requires the 'raw' checkpoint format.")
+    shard_compression = args_dict.get('shard_compression', __optional_arguments['shard_compression'])
+    file_name_include_epoch = args_dict.get('file_name_include_epoch', __optional_arguments['file_name_include_epoch'])
+    if shard_compression and lz4 is None:
+        raise ImportError("shard_compression requires the lz4 package. (pip install lz4)")
+
+    snapshot_future = None
     if snapshot_path:
-        assert os.path.exists (snapshot_path), f"can't open file \'{snapshot_path}\': No such file or directory"
-        snapshot = torch.load(snapshot_path, map_location='cpu')
-        starting_epoch = snapshot['epoch']+1
-        del snapshot
+        # The snapshot is only looked up on rank 0, so the storage does not see a metadata request from every rank
+        if os.environ.get("OMPI_COMM_WORLD_RANK") == "0":
+            # Read the snapshot in the background while MPI is brought up
+            snapshot_executor = ThreadPoolExecutor(max_workers=1)
+            snapshot_future = snapshot_executor.submit(__read_snapshot_epoch, snapshot_path)
+            snapshot_executor.shutdown(wait=False)
 
     communicator = MPI()
     max_shard_size = communicator.make_sharding_rank()
 
-    assert shard_size <= max_shard_size, f"The shard size is too large. (input: {shard_size}, max: {max_shard_size})"
+    if shard_size > max_shard_size:
+        raise ValueError(f"The shard size is too large. (input: {shard_size}, max: {max_shard_size})")
 
+    if snapshot_path:
+        # Only the epoch of the snapshot is needed here, so it is read once by rank 0 and broadcast to the other ranks
+        snapshot_error = None
+        if communicator.rank == 0:
+            try:
+                starting_epoch = int(snapshot_future.result() if snapshot_future is not None else __read_snapshot_epoch(snapshot_path))+1
+            except Exception as error:
+                # The other ranks are waiting in the broadcast, so they are told about the failure instead of hanging
+                snapshot_error = error
+                starting_epoch = _SNAPSHOT_READ_FAILED
+        starting_epoch = communicator.broadcast_int(starting_epoch, root=0)
+        if snapshot_error is not None:
+            raise snapshot_error
+        if starting_epoch == _SNAPSHOT_READ_FAILED:
+            raise RuntimeError(f"Reading the snapshot \'{snapshot_path}\' failed on rank 0.")
+
+    if training_master_address is None or training_master_port is None:
+        # Without a given master, rank 0 hosts the torch.distributed store on a free port and shares its address over MPI
+        training_master = None
+        if communicator.rank == 0:
+            training_master = f"{training_master_address or communicator.Get_processor_name()}:{training_master_port or __find_free_port()}".encode()
+        training_master_address, training_master_port = communicator.broadcast_bytes(training_master, root=0).decode().rsplit(':', 1)
+
+    # Both node types need the save count: the remote node to know how many checkpoints to receive,
+    # and the training nodes to know how many iterations the Copier and Sender threads run
     save_count = calculate_save_count(starting_epoch, total_epochs, save_period)
 
     train_node = None
     remote_node = None
 
-    if communicator.rank == communicator.size-1:
-        remote_node = __init_remote_node(communicator, save_count, remote_buffer_size, shard_size, model_name, file_name_include_datetime, file_save_in_dictionary)
+    if communicator.is_remote:
+        remote_node = __init_remote_node(communicator, save_count, remote_buffer_size, shard_size, model_name, file_name_include_datetime, file_save_in_dictionary, max_batch_bytes > 0, shard_compression, file_name_include_epoch)
         remote_node.start()
-        sys.exit()
+        remote_node.join()
+
+        # The remote node has nothing left to clean up, so it skips the interpreter shutdown.
+        # MPI is still finalized, since the launcher treats a process that exits without it as failed.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        communicator.finalize()
+        os._exit(0)
     else:
-        train_node = __init_train_node(communicator, training_master_address, training_master_port, save_count, shard_size)
+        train_node = __init_train_node(communicator, training_master_address, training_master_port, save_count, shard_size, max_batch_bytes, max_batch_delay, async_copy, checkpoint_format, checkpoint_dtype, shard_compression)
         if train_node_auto_start:
             train_node.start()
     
@@ -852,7 +1756,10 @@ def destroy_ACUTE():
     """
     Destroy the ACUTE environment.
     """
-    destroy_process_group ()
+    _import_torch()
+    # The process group is only created by init_ACUTE on training nodes, so there may be nothing to tear down
+    if torch.distributed.is_initialized():
+        torch.distributed.destroy_process_group ()
 
 if __name__ == "__main__":
     print("This Python code is a package file.")
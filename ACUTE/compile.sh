@@ -1 +1 @@
-mpic++ -shared -o mpi_module.so -fPIC mpi_module.cpp
\ No newline at end of file
+mpic++ -shared -o mpi_module.so -fPIC -pthread mpi_module.cpp
@@ -1,5 +1,10 @@
 #include <mpi.h>
 #include <cstdlib>
+#include <vector>
+#include <atomic>
+#include <thread>
+#include <mutex>
+#include <condition_variable>
 
 class MPICommunication {
 public:
@@ -25,10 +30,22 @@ public:
         MPI_Recv(data, count, datatype, source, tag, MPI_COMM_WORLD, status);
     }
 
+    void _irecv(int source, int tag, void* data, int count, MPI_Datatype datatype, MPI_Request* request) {
+        MPI_Irecv(data, count, datatype, source, tag, MPI_COMM_WORLD, request);
+    }
+
+    void _waitAll(int count, MPI_Request* requests) {
+        MPI_Waitall(count, requests, MPI_STATUSES_IGNORE);
+    }
+
     void _allGather(void* send_data, int send_count, MPI_Datatype send_datatype, void* recv_data, int recv_count, MPI_Datatype recv_datatype) {
         MPI_Allgather(send_data, send_count, send_datatype, recv_data, recv_count, recv_datatype, MPI_COMM_WORLD);
     }
 
+    void _broadcast(void* data, int count, MPI_Datatype datatype, int root) {
+        MPI_Bcast(data, count, datatype, root, MPI_COMM_WORLD);
+    }
+
     int _getRank() {
 	    return rank;
     }
@@ -50,6 +67,99 @@ private:
 	int provided;
 };
 
+// Sends the enqueued buffers in order on its own thread, so the caller never waits for MPI_Send.
+// The caller keeps each buffer alive until waitSend() reports that it has been sent.
+// The buffers are passed through a bounded single-producer single-consumer ring, so enqueueing only takes a lock
+// to wake the sender thread when it is idle, and blocks while capacity buffers are still waiting to be sent.
+class SenderThread {
+public:
+    SenderThread(MPICommunication* mpi_comm, int dest, int tag, int capacity)
+        : mpi_comm(mpi_comm), dest(dest), tag(tag), capacity(capacity), ring(capacity),
+          tail(0), sent_count(0), consumer_waiting(false), stopping(false) {
+        thread = std::thread(&SenderThread::run, this);
+    }
+
+    ~SenderThread() {
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            stopping = true;
+        }
+        queued.notify_one();
+        thread.join();
+    }
+
+    // A datatype other than MPI_BYTE is freed by the sender thread once the message has been sent
+    void enqueue(void* data, int count, MPI_Datatype datatype) {
+        // A slot is reused only after the buffer in it has been sent
+        long position = tail.load(std::memory_order_relaxed);
+        wait(position + 1 - capacity);
+        ring[position % capacity] = SendRequest{data, count, datatype};
+        tail.store(position + 1);
+
+        if (consumer_waiting.load()) {
+            std::lock_guard<std::mutex> lock(mutex);
+            queued.notify_one();
+        }
+    }
+
+    void wait(long count) {
+        if (sent_count.load(std::memory_order_acquire) >= count) {
+            return;
+        }
+        std::unique_lock<std::mutex> lock(mutex);
+        sent.wait(lock, [&] { return sent_count.load(std::memory_order_acquire) >= count; });
+    }
+
+private:
+    void run() {
+        long position = 0;
+        while (true) {
+            if (tail.load(std::memory_order_acquire) == position) {
+                std::unique_lock<std::mutex> lock(mutex);
+                consumer_waiting.store(true);
+                queued.wait(lock, [&] { return stopping || tail.load() != position; });
+                consumer_waiting.store(false);
+                if (tail.load() == position) {
+                    return;
+                }
+            }
+
+            SendRequest request = ring[position % capacity];
+            mpi_comm->_send(dest, tag, request.data, request.count, request.datatype);
+            if (request.datatype != MPI_BYTE) {
+                MPI_Type_free(&request.datatype);
+            }
+            position++;
+
+            {
+                std::lock_guard<std::mutex> lock(mutex);
+                sent_count.store(position, std::memory_order_release);
+            }
+            sent.notify_all();
+        }
+    }
+
+    MPICommunication* mpi_comm;
+    int dest;
+    int tag;
+    long capacity;
+    struct SendRequest {
+        void* data;
+        int count;
+        MPI_Datatype datatype;
+    };
+
+    std::vector<SendRequest> ring;
+    std::atomic<long> tail;
+    std::atomic<long> sent_count;
+    std::atomic<bool> consumer_waiting;
+    bool stopping;
+    std::mutex mutex;
+    std::condition_variable queued;
+    std::condition_variable sent;
+    std::thread thread;
+};
+
 extern "C" {
     MPICommunication* create_mpi_communication() {
         return new MPICommunication();
@@ -63,17 +173,86 @@ extern "C" {
         mpi_comm->_send(dest, tag, data, count, MPI_BYTE);
     }
 
-    void recv(MPICommunication* mpi_comm, int source, int tag, void** data, int* count) {
+    SenderThread* startSenderThread(MPICommunication* mpi_comm, int dest, int tag, int capacity) {
+        return new SenderThread(mpi_comm, dest, tag, capacity);
+    }
+
+    void enqueueSend(SenderThread* sender, void* data, int count) {
+        sender->enqueue(data, count, MPI_BYTE);
+    }
+
+    // Sends several buffers as one message without joining them, through a datatype over their absolute addresses
+    void enqueueSendParts(SenderThread* sender, void** parts, int* counts, int n) {
+        std::vector<MPI_Aint> displacements(n);
+        for (int i = 0; i < n; i++) {
+            MPI_Get_address(parts[i], &displacements[i]);
+        }
+        MPI_Datatype datatype;
+        MPI_Type_create_hindexed(n, counts, displacements.data(), MPI_BYTE, &datatype);
+        MPI_Type_commit(&datatype);
+        sender->enqueue(MPI_BOTTOM, 1, datatype);
+    }
+
+    void waitSend(SenderThread* sender, long count) {
+        sender->wait(count);
+    }
+
+    void stopSenderThread(SenderThread* sender) {
+        delete sender;
+    }
+
+    // The size comes from the MPI envelope, so messages need no length prefix and the receive buffer is sized exactly
+    int probe(MPICommunication* mpi_comm, int source, int tag) {
         MPI_Status status;
+        int count;
         MPI_Probe(source, tag, MPI_COMM_WORLD, &status);
-        MPI_Get_count(&status, MPI_BYTE, count);
-        *data = malloc(*count);
-        mpi_comm->_recv(source, tag, *data, *count, MPI_BYTE, &status);
+        MPI_Get_count(&status, MPI_BYTE, &count);
+        return count;
+    }
+
+    void recvInto(MPICommunication* mpi_comm, int source, int tag, void* data, int count) {
+        mpi_comm->_recv(source, tag, data, count, MPI_BYTE, MPI_STATUS_IGNORE);
+    }
+    void probeAll(MPICommunication* mpi_comm, int* sources, int n, int tag, int* counts) {
+        for (int i = 0; i < n; i++) {
+            counts[i] = probe(mpi_comm, sources[i], tag);
+        }
+    }
+
+    void recvAllInto(MPICommunication* mpi_comm, int* sources, int n, int tag, void** data, int* counts) {
+        MPI_Request* requests = new MPI_Request[n];
+        for (int i = 0; i < n; i++) {
+            mpi_comm->_irecv(sources[i], tag, data[i], counts[i], MPI_BYTE, &requests[i]);
+        }
+        mpi_comm->_waitAll(n, requests);
+        delete[] requests;
     }
+
+    void* createRequests(int n) {
+        return new MPI_Request[n];
+    }
+
+    void irecvInto(MPICommunication* mpi_comm, int source, int tag, void* data, int count, void* requests, int index) {
+        mpi_comm->_irecv(source, tag, data, count, MPI_BYTE, &static_cast<MPI_Request*>(requests)[index]);
+    }
+
+    void waitAll(MPICommunication* mpi_comm, void* requests, int n) {
+        mpi_comm->_waitAll(n, static_cast<MPI_Request*>(requests));
+        delete[] static_cast<MPI_Request*>(requests);
+    }
+
     void allGatherInt(MPICommunication* mpi_comm, void* send_data, int send_count, void* recv_data, int recv_count) {
         mpi_comm->_allGather(send_data, send_count, MPI_INT, recv_data, recv_count, MPI_INT);
     }
 
+    void broadcastInt(MPICommunication* mpi_comm, int* data, int root) {
+        mpi_comm->_broadcast(data, 1, MPI_INT, root);
+    }
+
+    void broadcastBytes(MPICommunication* mpi_comm, void* data, int count, int root) {
+        mpi_comm->_broadcast(data, count, MPI_BYTE, root);
+    }
+
     int getRank(MPICommunication* mpi_comm) {
 	    return mpi_comm->_getRank();
     }
@@ -83,8 +262,5 @@ extern "C" {
     void getProcessorName(MPICommunication* mpi_comm, void** buf, int* size) {
 	    *buf = mpi_comm->_getProcessorName(size);
     }
-    void free_buffer(void* data) {
-	    free(data);
-    }
 }
 
@@ -44,13 +44,31 @@ class Trainer:
 
     def _load_snapshot(self, snapshot_path):
         loc = f"cuda:{self.local_rank}"
-        snapshot = torch.load(snapshot_path, map_location=loc)
+        # Mapping the file lets the ranks of a node share the page cache instead of each reading the snapshot into its own memory
+        snapshot = ACUTE.load_checkpoint(snapshot_path, map_location=loc, mmap_tensors=True)
+
+        if snapshot_path.endswith('.safetensors'):
+            # A safetensors snapshot is a flat model state dict with the epoch in its header metadata,
+            # so the optimizer and the scheduler start over
+            from safetensors import safe_open
+            with safe_open(snapshot_path, framework='pt') as f:
+                self.epochs_run = int(f.metadata()['epoch'])+1
+            self.model.module.load_state_dict(snapshot)
+        else:
+            self.epochs_run = snapshot['epoch']+1
+            self.model.module.load_state_dict(snapshot['model_state_dict'])
+            self.optimizer.load_state_dict(snapshot['optimizer_state_dict'])
+            self.scheduler.load_state_dict(snapshot['scheduler_state_dict'])
+        del snapshot
+
+        if hasattr(os, 'posix_fadvise'):
+            # The snapshot is on the GPU now, so its pages are dropped from the page cache to leave it to the dataloader
+            fd = os.open(snapshot_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
 
-        self.epochs_run = snapshot['epoch']+1
-        self.model.module.load_state_dict(snapshot['model_state_dict'])
-        self.optimizer.load_state_dict(snapshot['optimizer_state_dict'])
-        self.scheduler.load_state_dict(snapshot['scheduler_state_dict'])
-        
         print(f"Resuming training from snapshot at Epoch {self.epochs_run}")
 
     def _make_snapshot (self, epoch) -> dict:
@@ -185,16 +203,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser (description='simple distributed training job')
     parser.add_argument ('total_epochs', type=int, help='Total epochs to train the model')
     parser.add_argument ('save_period', type=int, help='How often to save a snapshot')
-    parser.add_argument ('training_master_addr', type=str, help='Training node IP address with rank 0')
-    parser.add_argument ('training_master_port', type=str, help="Training node port number with rank 0")
+    parser.add_argument ('training_master_addr', nargs='?', default=None, type=str, help='Training node IP address with rank 0. If omitted, it is found by ACUTE. (default: None)')
+    parser.add_argument ('training_master_port', nargs='?', default=None, type=str, help="Training node port number with rank 0. If omitted, a free port is chosen by ACUTE. (default: None)")
     parser.add_argument ('--starting_epoch', default=1, type=int, help='Input the start epoch for the ACUTE module. If epoch information exists in the snapshot file, that information will take precedence. (default: 1)')
     parser.add_argument ('--batch_size', default=32, type=int, help='Input batch size on each device (default: 32)')
     parser.add_argument ('--remote_buffer_size', default=1, type=int, help='Input data buffer size of remote node. (default: 1)')
     parser.add_argument ('--shard_size', default=1, type=int, help='Input size of sharding (default: 1)')
     parser.add_argument ('--model_name', default='user_model', type=str, help='Input your ML model name (default: user_model)')
     parser.add_argument ('--file_name_include_datetime', '--file_date', default=False, type=bool, help='Add datetime to checkpoint files. (default: False)')
+    parser.add_argument ('--file_name_include_epoch', '--file_epoch', default=False, type=bool, help='Add the epoch to checkpoint files, so resuming from them does not read the file. (default: False)')
     parser.add_argument ('--file_save_in_dictionary', '--file_dictionary', default=False, type=bool, help='Checkfiles will be saved in a dictionary (default: False)')
     parser.add_argument ('--snapshot_path', default=None, type=str, help='Input checkpoint file name (default: None)')
+    parser.add_argument ('--max_batch_bytes', default=0, type=int, help='Coalesce queued shards into one message up to this size in bytes. 0 disables batching. (default: 0)')
+    parser.add_argument ('--max_batch_delay', default=0.0, type=float, help='Maximum time in seconds to wait for further shards of a batch. (default: 0.0)')
+    parser.add_argument ('--async_copy', default=False, type=bool, help='Copy the model data to pinned host memory asynchronously before dumping. (default: False)')
+    parser.add_argument ('--checkpoint_format', default='torch', choices=['torch', 'raw'], type=str, help='Format of the checkpoint files. \'raw\' skips pickling the tensors; load it with ACUTE.load_checkpoint(). (default: torch)')
+    parser.add_argument ('--checkpoint_dtype', default=None, choices=['bfloat16', 'float16', 'int8'], type=str, help='Store floating point tensors as this dtype. Requires --checkpoint_format raw. (default: None)')
+    parser.add_argument ('--shard_compression', default=False, type=bool, help='Compress shards with LZ4 before sending them to the remote node. Requires the lz4 package. (default: False)')
     args = parser.parse_args ()
 
     communicator, train_node, _ = ACUTE.init_ACUTE(args) # [ACUTE] Initialize the ACUTE environment.